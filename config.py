@@ -6,7 +6,28 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def get_bool_env(name: str, default: bool = False) -> bool:
+    """Читает логический флаг из переменной окружения ("1", "true", "yes", "on" - включено)."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 
 
+# Токен API приложения Crypto Pay (тот же, что использует бот).
+# Из него вычисляется ключ проверки подписи вебхуков: HMAC-SHA256 с ключом SHA256(токен).
+# Если токен не задан, подпись не проверяется (небезопасно).
 CRYPTO_PAY_API_TOKEN = os.getenv("CRYPTO_PAY_API_TOKEN")
+
+# Фоновая очередь отправки уведомлений в Telegram.
+# Если включена, обработчик вебхука отвечает Crypto Pay сразу, а уведомление отправляется фоновой задачей.
+# Очередь хранится в памяти процесса: уведомления, не отправленные до аварийной остановки процесса, теряются,
+# а Crypto Pay не будет повторять уже подтвержденный вебхук.
+# Подходит только для постоянно работающего сервера (gunicorn_conf.py и локальный запуск main.py включают ее
+# по умолчанию). В serverless-окружении (Vercel) процесс может быть заморожен сразу после ответа,
+# поэтому по умолчанию очередь выключена и уведомление отправляется до ответа Crypto Pay.
+NOTIFICATION_QUEUE_ENABLED = get_bool_env("NOTIFICATION_QUEUE_ENABLED")
@@ -0,0 +1,24 @@
+"""
+Конфигурация gunicorn для самостоятельного (не Vercel) развертывания webhook-сервера.
+
+Запуск:
+    gunicorn main:app -c gunicorn_conf.py
+
+Каждый воркер - отдельный процесс с собственным event loop uvicorn,
+поэтому разбор JSON, проверка подписи и валидация выполняются параллельно на всех ядрах.
+"""
+import multiprocessing
+import os
+
+# Сервер под gunicorn работает постоянно, поэтому фоновая очередь уведомлений включена по умолчанию
+# (см. NOTIFICATION_QUEUE_ENABLED в config.py). Воркеры наследуют окружение мастер-процесса.
+os.environ.setdefault("NOTIFICATION_QUEUE_ENABLED", "1")
+
+bind = os.getenv("WEBHOOK_BIND", "0.0.0.0:8001")
+worker_class = "uvicorn_worker.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+keepalive = 30
+
+# Access-лог отключен по той же причине, что и при локальном запуске uvicorn в main.py
+accesslog = None
+errorlog = "-"
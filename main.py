@@ -1,15 +1,20 @@
 """
 Основной файл FastAPI webhook-сервера для Crypto Pay.
 """
+import asyncio
 import logging
 import hmac
+import random
 import hashlib
-import json
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, Set
 
-from fastapi import FastAPI, Request, HTTPException, Header
-from pydantic import BaseModel, Field
-import requests # Для отправки сообщений через Telegram Bot API
+from fastapi import FastAPI, Request, HTTPException, Header, Response
+from pydantic import BaseModel, ConfigDict, Field
+import anyio
+import orjson # Быстрый разбор JSON прямо из bytes
+import httpx # Асинхронный HTTP-клиент для Telegram Bot API
 
 import config # Файл конфигурации webhook-сервера
 
@@ -17,113 +22,323 @@ import config # Файл конфигурации webhook-сервера
 logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s - %(levelname)s - %(name)s - %(message)s")
 logger = logging.getLogger(__name__)
+# httpx логирует каждый запрос на уровне INFO вместе с URL, а URL Telegram Bot API содержит токен бота
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Токен бота читается из конфигурации один раз; без него сервер не сможет уведомлять пользователей,
+# поэтому запуск прерывается сразу, а не на первом вебхуке.
+_BOT_TOKEN = config.TELEGRAM_BOT_TOKEN
+if not _BOT_TOKEN:
+    raise RuntimeError("TELEGRAM_BOT_TOKEN is not set. Add it to the environment or .env file.")
+
+# URL метода sendMessage вычисляется один раз при загрузке модуля
+TELEGRAM_SEND_URL = f"https://api.telegram.org/bot{_BOT_TOKEN}/sendMessage"
+
+# Crypto Pay подписывает вебхуки HMAC-SHA256 от тела запроса, ключ - SHA256 от токена API приложения.
+# Заранее инициализированное состояние HMAC (ipad/opad для ключа) копируется для каждого запроса,
+# чтобы не пересчитывать ключ заново.
+# SHA-256 считается через OpenSSL, который сам использует аппаратные расширения SHA, если они есть.
+_HMAC_TEMPLATE = (
+    hmac.new(hashlib.sha256(config.CRYPTO_PAY_API_TOKEN.encode("utf-8")).digest(), None, hashlib.sha256)
+    if config.CRYPTO_PAY_API_TOKEN else None
+)
+
+# Размер пула потоков для синхронного кода (sync-зависимости, run_in_executor).
+# По умолчанию Starlette допускает до 40 потоков, что при всплесках нагрузки приводит к блокировкам.
+THREADPOOL_MAX_WORKERS = 8
+
+# Задержки (в секундах) перед повторными попытками отправки в Telegram и максимальный случайный разброс к ним
+TELEGRAM_RETRY_DELAYS = (0.1, 0.4)
+TELEGRAM_RETRY_JITTER = 0.05
+# Максимальное время (в секундах), которое можно ждать по retry_after из ответа 429 перед повтором.
+# Если Telegram просит подождать дольше, уведомление не повторяется, чтобы не держать отправку.
+TELEGRAM_MAX_RETRY_AFTER = 5.0
+
+# Параметры фоновой отправки уведомлений в Telegram:
+# максимальная длина очереди (при переполнении уведомление отправляется сразу из обработчика)
+# и число одновременных отправок.
+NOTIFICATION_QUEUE_MAXSIZE = 1000
+NOTIFICATION_MAX_CONCURRENCY = 20
+# Сколько секунд при остановке ждать отправки уже поставленных в очередь уведомлений.
+# Одна отправка со всеми повторами занимает до ~16 секунд (3 попытки по 5 с таймаута плюс задержки).
+NOTIFICATION_DRAIN_TIMEOUT = 20.0
+
+# Максимальный размер тела вебхука. Уведомления Crypto Pay занимают единицы килобайт.
+MAX_WEBHOOK_BODY_SIZE = 16384
+
+# Общий асинхронный HTTP-клиент для Telegram Bot API.
+# Синхронный requests.post блокировал бы event loop на время запроса к Telegram.
+# Пул keep-alive соединений позволяет не устанавливать TCP+TLS заново для каждого уведомления.
+tg_client = httpx.AsyncClient(
+    timeout=5.0,
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=32, keepalive_expiry=60.0),
+)
+
+def configure_threadpool():
+    """Ограничивает пулы потоков, в которых выполняется синхронный код."""
+    # Лимитер anyio используется Starlette/FastAPI для sync-эндпоинтов и зависимостей
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_MAX_WORKERS
+    # Пул по умолчанию для loop.run_in_executor(None, ...)
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=THREADPOOL_MAX_WORKERS, thread_name_prefix="fapi"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Запуск и остановка приложения."""
+    configure_threadpool()
+    if config.NOTIFICATION_QUEUE_ENABLED:
+        await start_notification_worker()
+    yield
+    # Сначала дожидаемся отправки уведомлений из очереди, затем закрываем HTTP-клиент Telegram
+    await stop_notification_worker()
+    await tg_client.aclose()
 
 app = FastAPI(
     title="Crypto Pay Webhook Server",
     description="Принимает уведомления от Crypto Pay и уведомляет пользователей через Telegram.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # --- Модели данных Pydantic для входящих вебхуков ---
 # Структура вебхука от Crypto Pay может варьироваться.
-# Это примерная модель, основанная на общих ожиданиях.
 # Обратитесь к официальной документации Crypto Pay для точной структуры.
+# Валидируется только объект payload и только те поля, которые читает обработчик;
+# остальные поля (fee, fiat_amount, description и т.д.) игнорируются.
+# Модель неизменяемая: она только передает данные из вебхука в обработчик.
 class InvoicePayload(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     invoice_id: int
     status: str
     amount: Optional[str] = None # Сумма в криптовалюте
     asset: Optional[str] = None
-    fee: Optional[str] = None
-    fiat_amount: Optional[str] = None # Сумма в фиате, если была указана
-    fiat_currency: Optional[str] = None
-    description: Optional[str] = None
     custom_payload: Optional[str] = Field(None, alias="payload") # Поле payload из CryptoPay
-    # ... другие поля, которые может присылать Crypto Pay
-
-class CryptoPayWebhook(BaseModel):
-    update_id: int
-    update_type: str # Например, "invoice_paid"
-    request_date: str # ISO 8601 format date string
-    payload: InvoicePayload
 
 # --- Вспомогательные функции ---
+def get_retry_after(response: httpx.Response) -> Optional[float]:
+    """Возвращает задержку из ответа 429 Telegram (parameters.retry_after или заголовок Retry-After)."""
+    try:
+        return float(orjson.loads(response.content)["parameters"]["retry_after"])
+    except (orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+        pass
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
 async def send_telegram_message(chat_id: int, text: str):
-    """Отправляет сообщение пользователю через Telegram Bot API."""
-    telegram_api_url = f"https://api.telegram.org/bot{config.TELEGRAM_BOT_TOKEN}/sendMessage"
+    """
+    Отправляет сообщение пользователю через Telegram Bot API.
+    Таймауты, сетевые ошибки и 5xx повторяются с экспоненциальной задержкой.
+    429 повторяется только после указанного Telegram retry_after, если он не больше TELEGRAM_MAX_RETRY_AFTER.
+    Остальные ответы 4xx означают ошибку в запросе и не повторяются.
+    """
     payload = {
         "chat_id": chat_id,
         "text": text,
         "parse_mode": "HTML"
     }
+    attempts = len(TELEGRAM_RETRY_DELAYS) + 1
+    for attempt in range(1, attempts + 1):
+        # str(e) у исключений httpx может содержать URL запроса, а в нем токен бота,
+        # поэтому в лог пишутся код ответа и тело либо текст ошибки с замаскированным токеном.
+        try:
+            response = await tg_client.post(TELEGRAM_SEND_URL, json=payload)
+            response.raise_for_status()
+            logger.info(f"Successfully sent message to chat_id {chat_id}")
+            return True
+        except httpx.HTTPStatusError as e:
+            status_code = e.response.status_code
+            logger.error(f"Failed to send Telegram message to chat_id {chat_id} (attempt {attempt}/{attempts}): HTTP {status_code}")
+            logger.error(f"Response content: {e.response.content}")
+            if status_code == 429:
+                retry_after = get_retry_after(e.response)
+                if attempt == attempts or retry_after is None or retry_after > TELEGRAM_MAX_RETRY_AFTER:
+                    logger.error(f"Telegram rate limit for chat_id {chat_id}, retry_after={retry_after}. Giving up.")
+                    return False
+                await asyncio.sleep(retry_after + random.uniform(0, TELEGRAM_RETRY_JITTER))
+                continue
+            if status_code < 500:
+                return False
+        except httpx.HTTPError as e:
+            error_text = str(e).replace(_BOT_TOKEN, "<TELEGRAM_BOT_TOKEN>")
+            logger.error(f"Failed to send Telegram message to chat_id {chat_id} (attempt {attempt}/{attempts}): {type(e).__name__}: {error_text}")
+        if attempt < attempts:
+            await asyncio.sleep(TELEGRAM_RETRY_DELAYS[attempt - 1] + random.uniform(0, TELEGRAM_RETRY_JITTER))
+    return False
+
+# --- Фоновая отправка уведомлений ---
+# Включается флагом config.NOTIFICATION_QUEUE_ENABLED (см. config.py); иначе уведомления отправляются сразу.
+# Обработчик вебхука кладет (chat_id, text) в очередь и сразу отвечает Crypto Pay.
+# Фоновая задача забирает уведомления и отправляет каждое в отдельной задаче;
+# семафор ограничивает число одновременных отправок, поэтому медленная отправка
+# занимает только один слот и не задерживает остальные уведомления.
+# Очередь создается при запуске приложения (lifespan), чтобы она была привязана к event loop сервера.
+notification_queue: Optional[asyncio.Queue] = None
+_notification_worker: Optional[asyncio.Task] = None
+_notification_tasks: Set[asyncio.Task] = set()
+
+async def _send_queued_notification(chat_id: int, text: str, semaphore: asyncio.Semaphore):
+    """Отправляет одно уведомление из очереди и освобождает слот семафора."""
     try:
-        response = requests.post(telegram_api_url, json=payload, timeout=5)
-        response.raise_for_status()
-        logger.info(f"Successfully sent message to chat_id {chat_id}")
-        return True
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to send Telegram message to chat_id {chat_id}: {e}")
-        logger.error(f"Response content: {response.content if 'response' in locals() else 'No response'}")
-        return False
+        await send_telegram_message(chat_id, text)
+    except Exception as e:
+        logger.error(f"Unexpected error while notifying chat_id {chat_id}: {e}")
+    finally:
+        semaphore.release()
+        notification_queue.task_done()
+
+async def notification_worker():
+    """Забирает уведомления из очереди и отправляет их параллельно, не более NOTIFICATION_MAX_CONCURRENCY сразу."""
+    semaphore = asyncio.Semaphore(NOTIFICATION_MAX_CONCURRENCY)
+    while True:
+        # Слот занимается до извлечения из очереди: пока все слоты заняты, уведомления остаются в очереди
+        await semaphore.acquire()
+        try:
+            chat_id, text = await notification_queue.get()
+        except BaseException:
+            semaphore.release()
+            raise
+        task = asyncio.create_task(_send_queued_notification(chat_id, text, semaphore))
+        _notification_tasks.add(task)
+        task.add_done_callback(_notification_tasks.discard)
+
+async def enqueue_notification(chat_id: int, text: str):
+    """
+    Ставит уведомление в очередь. Если очередь выключена, фоновая задача не запущена
+    или очередь переполнена, уведомление отправляется сразу.
+    """
+    if _notification_worker is None or _notification_worker.done():
+        await send_telegram_message(chat_id, text)
+        return
+    try:
+        notification_queue.put_nowait((chat_id, text))
+    except asyncio.QueueFull:
+        logger.warning(f"Notification queue is full, sending to chat_id {chat_id} inline.")
+        await send_telegram_message(chat_id, text)
+
+async def start_notification_worker():
+    """Создает очередь уведомлений и запускает фоновую задачу отправки."""
+    global notification_queue, _notification_worker
+    notification_queue = asyncio.Queue(maxsize=NOTIFICATION_QUEUE_MAXSIZE)
+    _notification_worker = asyncio.create_task(notification_worker())
+
+async def stop_notification_worker():
+    """Дожидается отправки поставленных в очередь уведомлений и останавливает фоновую задачу."""
+    global _notification_worker
+    if _notification_worker is None:
+        return
+    try:
+        await asyncio.wait_for(notification_queue.join(), NOTIFICATION_DRAIN_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.error(f"{notification_queue.qsize()} notifications were not sent before shutdown.")
+    _notification_worker.cancel()
+    for task in list(_notification_tasks):
+        task.cancel()
+    await asyncio.gather(_notification_worker, *_notification_tasks, return_exceptions=True)
+    _notification_worker = None
 
 def verify_signature(request_body: bytes, signature_header: Optional[str]) -> bool:
     """
     Проверяет подпись вебхука от Crypto Pay.
     Это ОБЯЗАТЕЛЬНО для безопасности, чтобы убедиться, что запрос пришел от Crypto Pay.
-    Метод проверки зависит от того, как Crypto Pay формирует подпись.
-    Обычно это HMAC-SHA256 от тела запроса с использованием вашего секретного токена.
+    Crypto Pay передает в заголовке 'crypto-pay-api-signature' hex-строку HMAC-SHA256 от тела запроса,
+    где ключ - SHA256 от токена API приложения (CRYPTO_PAY_API_TOKEN).
     """
-    if not config.CRYPTO_PAY_WEBHOOK_SECRET or not signature_header:
-        logger.warning("Webhook secret or signature header not configured/provided. Skipping signature verification. THIS IS INSECURE.")
+    if _HMAC_TEMPLATE is None:
+        logger.warning("CRYPTO_PAY_API_TOKEN not configured. Skipping signature verification. THIS IS INSECURE.")
         # В рабочей среде здесь должна быть ошибка или строгая проверка
         return True # Временно разрешаем без подписи для упрощения, но это небезопасно
 
+    if not signature_header:
+        logger.warning("Webhook signature header not provided.")
+        return False
+
     try:
-        # Пример: Crypto Pay может отправлять подпись в заголовке 'Crypto-Pay-Signature'
         # Тело запроса должно быть в том виде, в котором оно было при формировании подписи
-        key = config.CRYPTO_PAY_WEBHOOK_SECRET.encode("utf-8")
-        hasher = hmac.new(key, request_body, hashlib.sha256)
-        calculated_signature = hasher.hexdigest()
+        hasher = _HMAC_TEMPLATE.copy()
+        hasher.update(request_body)
+        calculated_signature = hasher.digest()
 
-        if hmac.compare_digest(calculated_signature, signature_header):
+        # Сравниваем сырые 32 байта дайджеста, а не hex-строки
+        if hmac.compare_digest(calculated_signature, bytes.fromhex(signature_header)):
             logger.info("Webhook signature verified successfully.")
             return True
         else:
-            logger.warning(f"Webhook signature mismatch. Calculated: {calculated_signature}, Received: {signature_header}")
+            logger.warning(f"Webhook signature mismatch. Calculated: {calculated_signature.hex()}, Received: {signature_header}")
             return False
     except Exception as e:
         logger.error(f"Error during webhook signature verification: {e}")
         return False
 
+async def read_body_limited(request: Request, limit: int = MAX_WEBHOOK_BODY_SIZE) -> bytes:
+    """
+    Читает тело запроса по частям, не допуская превышения лимита.
+    Слишком большие запросы отклоняются с кодом 413 до того, как будут прочитаны целиком.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length is not None:
+        try:
+            declared_size = int(content_length)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+        if declared_size > limit:
+            raise HTTPException(status_code=413, detail="Payload too large")
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > limit:
+            raise HTTPException(status_code=413, detail="Payload too large")
+    return bytes(body)
+
+# Шаблоны уведомлений по статусу инвойса; amount_part заполняется, только если известны сумма и валюта
+NOTIFICATION_TEMPLATES = {
+    "paid": "✅ Ваш платеж{amount_part} (Инвойс ID: {invoice_id}) успешно получен!",
+    "expired": "⌛️ Срок действия вашего платежа (Инвойс ID: {invoice_id}) истек.",
+}
+DEFAULT_NOTIFICATION_TEMPLATE = "Статус вашего платежа (Инвойс ID: {invoice_id}) обновлен: <b>{status}</b>."
+
+# Тела ответов обработчика сериализуются через orjson один раз при загрузке модуля.
+# Готовый Response не проходит через jsonable_encoder и stdlib json ни в одной версии FastAPI.
+_WEBHOOK_OK_BODY = orjson.dumps({"status": "ok", "message": "Webhook processed"})
+_WEBHOOK_NO_CHAT_ID_BODY = orjson.dumps(
+    {"status": "error", "message": "chat_id not found in payload, notification skipped"}
+)
+
 # --- Эндпоинт для вебхуков от Crypto Pay ---
 @app.post("/webhook/crypto_pay")
-async def crypto_pay_webhook_handler(request: Request, crypto_pay_signature: Optional[str] = Header(None)):
+async def crypto_pay_webhook_handler(request: Request, crypto_pay_signature: Optional[str] = Header(None, alias="crypto-pay-api-signature")) -> Response:
     """
     Обрабатывает входящие вебхуки от Crypto Pay.
     """
-    raw_body = await request.body()
-    logger.info(f"Received webhook. Headers: {request.headers}")
-    logger.info(f"Received webhook. Body: {raw_body.decode()}")
+    raw_body = await read_body_limited(request)
 
     # 1. Проверка подписи (ВАЖНО ДЛЯ БЕЗОПАСНОСТИ!)
-    # if not verify_signature(raw_body, crypto_pay_signature):
-    #     logger.error("Webhook signature verification failed.")
-    #     raise HTTPException(status_code=403, detail="Invalid signature")
-    # Пока проверка подписи закомментирована, т.к. требует точного знания алгоритма CryptoPay
-    # и наличия CRYPTO_PAY_WEBHOOK_SECRET. Пользователь должен будет это настроить.
-    logger.warning("Signature verification is currently lenient. Ensure CRYPTO_PAY_WEBHOOK_SECRET is set and verify_signature is enabled and correct for production.")
+    # Выполняется до любого разбора тела, чтобы поддельные запросы отсекались сразу.
+    # Если CRYPTO_PAY_API_TOKEN не задан, verify_signature пропускает проверку с предупреждением.
+    if not verify_signature(raw_body, crypto_pay_signature):
+        logger.error("Webhook signature verification failed.")
+        raise HTTPException(status_code=403, detail="Invalid signature")
+
+    # Заголовки и тело логируются только на уровне DEBUG, чтобы не форматировать их на каждом запросе
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Received webhook. Headers: %s", request.headers)
+        logger.debug("Received webhook. Body: %s", raw_body)
 
     try:
-        webhook_data_dict = json.loads(raw_body.decode())
-        webhook_data = CryptoPayWebhook(**webhook_data_dict)
-        logger.info(f"Parsed webhook data: {webhook_data.model_dump_json(indent=2)}")
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON decode error: {e}. Body: {raw_body.decode()}")
+        webhook_data_dict = orjson.loads(raw_body)
+        invoice_payload = InvoicePayload.model_validate(webhook_data_dict["payload"])
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Parsed webhook data: %s", invoice_payload.model_dump_json())
+    except orjson.JSONDecodeError as e:
+        logger.error(f"JSON decode error: {e}. Body: {raw_body.decode(errors='replace')}")
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
-    except Exception as e: # Pydantic ValidationError
+    except Exception as e: # Pydantic ValidationError, отсутствующий payload (KeyError/TypeError)
         logger.error(f"Webhook payload validation error: {e}. Body: {raw_body.decode()}")
         raise HTTPException(status_code=400, detail=f"Invalid payload structure: {e}")
 
-    invoice_payload = webhook_data.payload
     invoice_id = invoice_payload.invoice_id
     status = invoice_payload.status
     amount = invoice_payload.amount
@@ -132,13 +347,14 @@ async def crypto_pay_webhook_handler(request: Request, crypto_pay_signature: Opt
 
     chat_id: Optional[int] = None
     if custom_payload_str:
-        try:
-            # Ожидаем payload в формате "user_id:CHAT_ID"
-            if "user_id:" in custom_payload_str:
-                chat_id = int(custom_payload_str.split("user_id:")[-1])
+        # Ожидаем payload в формате "user_id:CHAT_ID"
+        _, sep, chat_id_str = custom_payload_str.rpartition("user_id:")
+        if sep:
+            try:
+                chat_id = int(chat_id_str)
                 logger.info(f"Extracted chat_id {chat_id} from custom_payload.")
-        except Exception as e:
-            logger.error(f"Could not parse chat_id from custom_payload 	'{custom_payload_str}	': {e}")
+            except ValueError as e:
+                logger.error(f"Could not parse chat_id from custom_payload 	'{custom_payload_str}	': {e}")
 
     if not chat_id:
         # Если chat_id не удалось извлечь, мы не можем уведомить пользователя.
@@ -148,27 +364,30 @@ async def crypto_pay_webhook_handler(request: Request, crypto_pay_signature: Opt
         # В микросервисной архитектуре, `chat_id` ДОЛЖЕН быть в `custom_payload`.
         logger.error(f"chat_id not found for invoice_id {invoice_id}. Cannot notify user.")
         # Можно вернуть 200 OK, чтобы CryptoPay не повторял отправку, но залогировать проблему.
-        return {"status": "error", "message": "chat_id not found in payload, notification skipped"}
+        return Response(content=_WEBHOOK_NO_CHAT_ID_BODY, media_type="application/json")
 
-    notification_text = f"Статус вашего платежа (Инвойс ID: {invoice_id}) обновлен: <b>{status.upper()}</b>."
-    if status == "paid":
-        notification_text = f"✅ Ваш платеж (Инвойс ID: {invoice_id}) успешно получен!"
-        if amount and asset:
-            notification_text = f"✅ Ваш платеж на сумму {amount} {asset} (Инвойс ID: {invoice_id}) успешно получен!"
-        # Здесь бот должен был бы удалить инвойс из своего temporary_invoice_storage
-        # crypto_pay_service.remove_invoice_from_storage(invoice_id) # Недоступно напрямую
-    elif status == "expired":
-        notification_text = f"⌛️ Срок действия вашего платежа (Инвойс ID: {invoice_id}) истек."
-        # crypto_pay_service.remove_invoice_from_storage(invoice_id) # Недоступно напрямую
+    amount_part = f" на сумму {amount} {asset}" if amount and asset else ""
+    # Для статусов paid и expired бот должен был бы удалить инвойс из своего temporary_invoice_storage
+    # crypto_pay_service.remove_invoice_from_storage(invoice_id) # Недоступно напрямую
+    notification_text = NOTIFICATION_TEMPLATES.get(status, DEFAULT_NOTIFICATION_TEMPLATE).format(
+        invoice_id=invoice_id, amount_part=amount_part, status=status.upper()
+    )
 
-    await send_telegram_message(chat_id, notification_text)
+    await enqueue_notification(chat_id, notification_text)
 
     # CryptoPay ожидает ответ 200 OK, если вебхук успешно обработан.
-    return {"status": "ok", "message": "Webhook processed"}
+    return Response(content=_WEBHOOK_OK_BODY, media_type="application/json")
 
 # Для локального запуска (не используется Vercel)
 if __name__ == "__main__":
     import uvicorn
+    # Локальный сервер работает постоянно, поэтому фоновая очередь уведомлений включена по умолчанию
+    config.NOTIFICATION_QUEUE_ENABLED = config.get_bool_env("NOTIFICATION_QUEUE_ENABLED", default=True)
     logger.info("Starting webhook server locally on http://localhost:8001")
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    # httptools и uvloop (uvicorn[standard]) быстрее h11 и стандартного asyncio-цикла;
+    # access-лог отключен, т.к. обработчик сам логирует каждый вебхук;
+    # собственные логи uvicorn ограничены уровнем WARNING (логи приложения настраиваются выше).
+    # loop="auto" выбирает uvloop, если он установлен (на Windows uvloop недоступен).
+    uvicorn.run(app, host="0.0.0.0", port=8001, loop="auto", http="httptools",
+                access_log=False, log_level="warning")
 